@@ -1,6 +1,6 @@
-from flttoolkit.types import FLT_OBJECT
+from flttoolkit.roots import get_volumes
 
-inst = FLT_OBJECT(0xFFFFA50F35610260)
+inst = get_volumes()[0].get_base()
 
 print(inst.is_instance_type)
 print(inst.is_volume_type)
@@ -0,0 +1,54 @@
+import struct
+from typing import *
+
+# Layout constants shared by the scanner, root discovery and integrity checks. This module must not import `pykd`:
+# it is loaded by the scanner worker processes, which run outside the debugger session.
+
+# Mirrors `FLT_OBJECT._FLT_OBJECT_FLAGS`.
+FLT_OBFL_TYPE_INSTANCE: int = 0x1000000
+FLT_OBFL_TYPE_FILTER: int = 0x2000000
+FLT_OBFL_TYPE_VOLUME: int = 0x4000000
+FLT_OBFL_TYPE_MASK: int = (
+    FLT_OBFL_TYPE_INSTANCE | FLT_OBFL_TYPE_FILTER | FLT_OBFL_TYPE_VOLUME
+)
+
+FLT_OBFL_TYPE_NAMES: Dict[int, str] = {
+    FLT_OBFL_TYPE_INSTANCE: "FLT_INSTANCE",
+    FLT_OBFL_TYPE_FILTER: "FLT_FILTER",
+    FLT_OBFL_TYPE_VOLUME: "FLT_VOLUME",
+}
+
+FLT_INSTANCE_POOL_TAG: bytes = b"FMis"
+FLT_FILTER_POOL_TAG: bytes = b"FMfl"
+FLT_VOLUME_POOL_TAG: bytes = b"FMvo"
+
+# Pool tags fltmgr uses for allocations that begin with a `_FLT_OBJECT`, mapped to the type bit the object must carry.
+FLT_POOL_TAGS: Dict[bytes, int] = {
+    FLT_INSTANCE_POOL_TAG: FLT_OBFL_TYPE_INSTANCE,
+    FLT_FILTER_POOL_TAG: FLT_OBFL_TYPE_FILTER,
+    FLT_VOLUME_POOL_TAG: FLT_OBFL_TYPE_VOLUME,
+}
+FLT_FRAME_POOL_TAG: bytes = b"FMfr"
+
+# x64 `_POOL_HEADER`: the tag lives at +4 and the allocation body starts at +0x10.
+POOL_HEADER_SIZE: int = 0x10
+POOL_HEADER_TAG_OFFSET: int = 4
+
+PAGE_SIZE: int = 0x1000
+KERNEL_ADDRESS_MIN: int = 0xFFFF800000000000
+
+FLT_OBJECT_PRIMARY_LINK_OFFSET: int = 0x10
+
+LIST_ENTRY: struct.Struct = struct.Struct("<QQ")
+
+# `_FLT_OBJECT` prefix: Flags, PointerCount, RundownRef, PrimaryLink.Flink, PrimaryLink.Blink.
+FLT_OBJECT_HEADER: struct.Struct = struct.Struct("<IIQQQ")
+
+
+def is_kernel_pointer(ptr: int) -> bool:
+    """Check if `ptr` is a pointer-aligned address in the x64 kernel half of the address space.
+
+    :return: `True` if `ptr` could point at a kernel pool allocation, `False` otherwise.
+    :rtype: bool
+    """
+    return ptr >= KERNEL_ADDRESS_MIN and (ptr & 7) == 0
@@ -0,0 +1,420 @@
+from pykd import module, loadBytes, MemoryException, SymbolException, TypeException
+from dataclasses import dataclass, field, asdict
+from typing import *
+import json
+import struct
+
+from flttoolkit.constants import (
+    FLT_OBFL_TYPE_INSTANCE,
+    FLT_OBFL_TYPE_FILTER,
+    FLT_OBFL_TYPE_VOLUME,
+    FLT_OBFL_TYPE_MASK,
+    FLT_OBJECT_PRIMARY_LINK_OFFSET,
+    LIST_ENTRY,
+    PAGE_SIZE,
+    is_kernel_pointer,
+)
+from flttoolkit.roots import FltRoots, get_roots
+
+_INTERNAL_POINTER: struct.Struct = struct.Struct("<Q")
+_INTERNAL_FLAGS: struct.Struct = struct.Struct("<I")
+# `_RTL_SPLAY_LINKS`: Parent, LeftChild, RightChild.
+_INTERNAL_SPLAY_LINKS: struct.Struct = struct.Struct("<QQQ")
+
+
+@dataclass
+class _Layout:
+    InstanceVolume: int
+    InstanceFilter: int
+    InstanceFilterLink: int
+    FilterInstanceList: int
+    InstanceTxContextTree: int
+    VolumeInstanceList: int
+    VolumeTxContextTree: int
+
+
+def _layout() -> _Layout:
+    """Resolve the field offsets the checks need from the type information of the loaded fltmgr build.
+
+    :raises RuntimeError: If the symbols do not carry fltmgr's types.
+    """
+    fltmgr: Any = module("fltmgr")
+    try:
+        rlist: int = fltmgr.type("_FLT_RESOURCE_LIST_HEAD").fieldOffset("rList")
+        instance: Any = fltmgr.type("_FLT_INSTANCE")
+        volume: Any = fltmgr.type("_FLT_VOLUME")
+        return _Layout(
+            InstanceVolume=instance.fieldOffset("Volume"),
+            InstanceFilter=instance.fieldOffset("Filter"),
+            InstanceFilterLink=instance.fieldOffset("FilterLink"),
+            InstanceTxContextTree=instance.fieldOffset("TransactionContexts")
+            + instance.field("TransactionContexts").fieldOffset("Tree"),
+            FilterInstanceList=fltmgr.type("_FLT_FILTER").fieldOffset("InstanceList") + rlist,
+            VolumeInstanceList=volume.fieldOffset("InstanceList") + rlist,
+            VolumeTxContextTree=volume.fieldOffset("TxVolContexts")
+            + volume.field("TxVolContexts").fieldOffset("Tree"),
+        )
+    except (SymbolException, TypeException) as e:
+        raise RuntimeError("fltmgr type information is required to check the filter manager structures") from e
+
+
+class _PageCache:
+    """Page-granular read cache shared by every walker of a single integrity check.
+
+    fltmgr objects are small pool allocations packed into the same pages, so reading whole pages turns the many small
+    field reads of a walk into one debugger round trip per distinct page. Unreadable pages are remembered as well.
+    """
+
+    def __init__(self) -> None:
+        self._pages: Dict[int, Optional[bytes]] = {}
+
+    def _page(self, page: int) -> Optional[bytes]:
+        if page not in self._pages:
+            try:
+                self._pages[page] = bytes(loadBytes(page, PAGE_SIZE))
+            except MemoryException:
+                self._pages[page] = None
+        return self._pages[page]
+
+    def read(self, address: int, size: int) -> Optional[bytes]:
+        """Return `size` bytes at `address`, or `None` if any page they span is unreadable."""
+        first: int = address & ~(PAGE_SIZE - 1)
+        offset: int = address - first
+        if offset + size <= PAGE_SIZE:
+            page: Optional[bytes] = self._page(first)
+            return None if page is None else page[offset : offset + size]
+
+        chunks: List[bytes] = []
+        for page_address in range(first, address + size, PAGE_SIZE):
+            page = self._page(page_address)
+            if page is None:
+                return None
+            chunks.append(page)
+        return b"".join(chunks)[offset : offset + size]
+
+    def read_pointer(self, address: int) -> Optional[int]:
+        raw: Optional[bytes] = self.read(address, _INTERNAL_POINTER.size)
+        return None if raw is None else _INTERNAL_POINTER.unpack(raw)[0]
+
+
+@dataclass
+class IntegrityViolation:
+    """A single structural defect.
+
+    `address` is the node at which the defect was observed. `expected` and `actual` hold the pointer or flag values
+    that disagree, when the defect is a mismatch.
+    """
+
+    kind: str
+    structure: str
+    address: int
+    expected: Optional[int] = None
+    actual: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return f"IntegrityViolation({self.kind}, {self.structure}, {hex(self.address)})"
+
+
+@dataclass
+class IntegrityReport:
+    """The outcome of an integrity check.
+
+    `objects_checked` counts distinct objects: an instance found on both its volume's and its filter's list is counted
+    once.
+    """
+
+    violations: List[IntegrityViolation] = field(default_factory=list)
+    objects_checked: int = 0
+    tree_nodes_checked: int = 0
+    tree_max_height: int = 0
+    _visited: Set[int] = field(default_factory=set, init=False, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+    def add(
+        self,
+        kind: str,
+        structure: str,
+        address: int,
+        expected: Optional[int] = None,
+        actual: Optional[int] = None,
+    ) -> None:
+        self.violations.append(
+            IntegrityViolation(kind, structure, address, expected, actual)
+        )
+
+    def to_json(self) -> str:
+        """Serialize the report. Addresses and values are emitted as hex strings.
+
+        :return: A JSON document with the counters and every violation.
+        :rtype: str
+        """
+
+        def _hex(value: Optional[int]) -> Optional[str]:
+            return None if value is None else hex(value)
+
+        return json.dumps(
+            {
+                "ok": self.ok,
+                "objects_checked": self.objects_checked,
+                "tree_nodes_checked": self.tree_nodes_checked,
+                "tree_max_height": self.tree_max_height,
+                "violations": [
+                    {
+                        **asdict(v),
+                        "address": _hex(v.address),
+                        "expected": _hex(v.expected),
+                        "actual": _hex(v.actual),
+                    }
+                    for v in self.violations
+                ],
+            },
+            indent=2,
+        )
+
+
+def _check_list(
+    cache: _PageCache,
+    head: int,
+    link_offset: int,
+    expected_type: int,
+    structure: str,
+    report: IntegrityReport,
+) -> List[int]:
+    """Walk a list of fltmgr objects once, checking link agreement, cycles and object types.
+
+    The `Blink` of each node is checked against the previous node, so no node is visited twice.
+
+    :param head: Address of the `_LIST_ENTRY` head.
+    :param link_offset: Offset of the `_LIST_ENTRY` the objects are linked through, e.g. `PrimaryLink`.
+    :param expected_type: The `_FLT_OBJECT_FLAGS` type bit every object on the list must carry.
+    :return: Addresses of the objects on the list that carry `expected_type`, in `Flink` order, up to the first
+        unrecoverable defect.
+    :rtype: List[int]
+    """
+    raw: Optional[bytes] = cache.read(head, LIST_ENTRY.size)
+    if raw is None:
+        report.add("unreadable", structure, head)
+        return []
+    flink, head_blink = LIST_ENTRY.unpack(raw)
+
+    objects: List[int] = []
+    seen: Set[int] = {head}
+    prev: int = head
+    node: int = flink
+
+    while node != head:
+        if not is_kernel_pointer(node):
+            report.add("bad_flink", structure, prev, actual=node)
+            return objects
+        if node in seen:
+            report.add("cycle", structure, prev, expected=head, actual=node)
+            return objects
+        seen.add(node)
+
+        obj: int = node - link_offset
+        links: Optional[bytes] = cache.read(node, LIST_ENTRY.size)
+        if links is None:
+            report.add("unreadable", structure, node)
+            return objects
+        next_flink, blink = LIST_ENTRY.unpack(links)
+        if obj not in report._visited:
+            report._visited.add(obj)
+            report.objects_checked += 1
+
+        if blink != prev:
+            report.add("blink_mismatch", structure, node, expected=prev, actual=blink)
+
+        flags: Optional[bytes] = cache.read(obj, _INTERNAL_FLAGS.size)
+        if flags is None:
+            report.add("unreadable", structure, obj)
+        else:
+            obj_type: int = _INTERNAL_FLAGS.unpack(flags)[0] & FLT_OBFL_TYPE_MASK
+            if obj_type != expected_type:
+                report.add("type_mismatch", structure, obj, expected_type, obj_type)
+            else:
+                objects.append(obj)
+
+        prev = node
+        node = next_flink
+
+    if head_blink != prev:
+        report.add("blink_mismatch", structure, head, expected=prev, actual=head_blink)
+
+    return objects
+
+
+def _check_instance_backpointers(
+    cache: _PageCache,
+    layout: _Layout,
+    instance: int,
+    volumes: Set[int],
+    filters: Set[int],
+    structure: str,
+    report: IntegrityReport,
+    owner_volume: Optional[int] = None,
+    owner_filter: Optional[int] = None,
+) -> None:
+    """Check that an instance's `Volume` and `Filter` point at live objects.
+
+    A back-pointer to the object owning the list being walked must point at that owner exactly; the other one only has
+    to point at some live object.
+    """
+    for kind, offset, owner, live in (
+        ("volume", layout.InstanceVolume, owner_volume, volumes),
+        ("filter", layout.InstanceFilter, owner_filter, filters),
+    ):
+        ptr: Optional[int] = cache.read_pointer(instance + offset)
+        if ptr is None:
+            report.add("unreadable", structure, instance + offset)
+        elif owner is not None and ptr != owner:
+            report.add(f"instance_{kind}_mismatch", structure, instance, owner, ptr)
+        elif ptr not in live:
+            report.add(f"instance_{kind}_not_live", structure, instance, actual=ptr)
+
+
+def _check_splay_tree(
+    cache: _PageCache, holder: int, structure: str, report: IntegrityReport
+) -> int:
+    """Walk a `_RTL_SPLAY_LINKS` tree once, checking pointers, parent back-pointers and cycles.
+
+    Splay trees are not height balanced, so balance is not a defect; the height is returned so callers can spot
+    degenerate trees.
+
+    :param holder: Address of the pointer to the root of the tree.
+    :return: The height of the tree, counting only the nodes that could be visited.
+    :rtype: int
+    """
+    root: Optional[int] = cache.read_pointer(holder)
+    if root is None:
+        report.add("unreadable", structure, holder)
+        return 0
+    if not root:
+        return 0
+    if not is_kernel_pointer(root):
+        report.add("bad_child", structure, holder, actual=root)
+        return 0
+
+    height: int = 0
+    seen: Set[int] = set()
+    # (node, expected parent, depth); the root of an RTL splay tree is its own parent.
+    stack: List[Tuple[int, int, int]] = [(root, root, 1)]
+
+    while stack:
+        node, parent, depth = stack.pop()
+        if node in seen:
+            report.add("tree_cycle", structure, parent, actual=node)
+            continue
+        seen.add(node)
+
+        raw: Optional[bytes] = cache.read(node, _INTERNAL_SPLAY_LINKS.size)
+        if raw is None:
+            report.add("unreadable", structure, node)
+            continue
+        node_parent, left, right = _INTERNAL_SPLAY_LINKS.unpack(raw)
+
+        if node_parent != parent:
+            report.add("tree_parent_mismatch", structure, node, parent, node_parent)
+
+        height = max(height, depth)
+        for child in (left, right):
+            if not child:
+                continue
+            if not is_kernel_pointer(child):
+                report.add("bad_child", structure, node, actual=child)
+                continue
+            stack.append((child, node, depth + 1))
+
+    report.tree_nodes_checked += len(seen)
+    report.tree_max_height = max(report.tree_max_height, height)
+    return height
+
+
+def check_integrity(roots: Optional[FltRoots] = None) -> IntegrityReport:
+    """Verify every filter, volume and instance list and every transaction context tree in a single pass.
+
+    Frame lists are walked first so that instance back-pointers can be checked against the sets of live filters and
+    volumes with a hash lookup. Instances are then walked from both sides: through each volume's `InstanceList` and
+    through each filter's `InstanceList`. Volume and instance `TransactionContexts` trees are checked during the volume
+    pass. All reads go through one page cache, so each page is fetched once.
+
+    :param roots: Roots to start from. Defaults to `flttoolkit.roots.get_roots()`.
+    :type roots: Optional[FltRoots]
+    :return: The violations found, with the exact addresses involved.
+    :rtype: IntegrityReport
+    """
+    if roots is None:
+        roots = get_roots()
+
+    layout: _Layout = _layout()
+    cache: _PageCache = _PageCache()
+    report: IntegrityReport = IntegrityReport()
+
+    filters: Set[int] = set()
+    volumes: Set[int] = set()
+    for frame in roots.Frames:
+        filters.update(
+            _check_list(
+                cache,
+                frame.RegisteredFilters,
+                FLT_OBJECT_PRIMARY_LINK_OFFSET,
+                FLT_OBFL_TYPE_FILTER,
+                f"frame {hex(frame.Frame)} RegisteredFilters",
+                report,
+            )
+        )
+        volumes.update(
+            _check_list(
+                cache,
+                frame.AttachedVolumes,
+                FLT_OBJECT_PRIMARY_LINK_OFFSET,
+                FLT_OBFL_TYPE_VOLUME,
+                f"frame {hex(frame.Frame)} AttachedVolumes",
+                report,
+            )
+        )
+
+    for volume in sorted(volumes):
+        structure: str = f"volume {hex(volume)} InstanceList"
+        for instance in _check_list(
+            cache,
+            volume + layout.VolumeInstanceList,
+            FLT_OBJECT_PRIMARY_LINK_OFFSET,
+            FLT_OBFL_TYPE_INSTANCE,
+            structure,
+            report,
+        ):
+            _check_instance_backpointers(
+                cache, layout, instance, volumes, filters, structure, report, owner_volume=volume
+            )
+            _check_splay_tree(
+                cache,
+                instance + layout.InstanceTxContextTree,
+                f"instance {hex(instance)} TransactionContexts",
+                report,
+            )
+
+        _check_splay_tree(
+            cache,
+            volume + layout.VolumeTxContextTree,
+            f"volume {hex(volume)} TxVolContexts",
+            report,
+        )
+
+    for flt in sorted(filters):
+        structure = f"filter {hex(flt)} InstanceList"
+        for instance in _check_list(
+            cache,
+            flt + layout.FilterInstanceList,
+            layout.InstanceFilterLink,
+            FLT_OBFL_TYPE_INSTANCE,
+            structure,
+            report,
+        ):
+            _check_instance_backpointers(
+                cache, layout, instance, volumes, filters, structure, report, owner_filter=flt
+            )
+
+    return report
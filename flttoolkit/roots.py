@@ -0,0 +1,321 @@
+from pykd import (
+    typedVarList,
+    module,
+    loadQWords,
+    ptrPtr,
+    loadBytes,
+    MemoryException,
+    SymbolException,
+    TypeException,
+)
+from dataclasses import dataclass, field
+from typing import *
+
+from flttoolkit.constants import (
+    FLT_FILTER_POOL_TAG,
+    FLT_FRAME_POOL_TAG,
+    FLT_OBJECT_PRIMARY_LINK_OFFSET,
+    FLT_VOLUME_POOL_TAG,
+    PAGE_SIZE,
+    POOL_HEADER_SIZE,
+    POOL_HEADER_TAG_OFFSET,
+    is_kernel_pointer,
+)
+
+if TYPE_CHECKING:
+    from flttoolkit.types import FLT_OBJECT, FLT_VOLUME
+
+# How far before `_FLT_FRAME.Links` the frame's pool header is looked for when the layout is unknown.
+_INTERNAL_FRAME_LINKS_MAX_OFFSET: int = 0x100
+
+# Discovered roots keyed by fltmgr build and load address. Lives for the whole debugger session.
+_INTERNAL_ROOTS_CACHE: Dict[Tuple[int, int, int], "FltRoots"] = {}
+
+
+@dataclass
+class FltFrameRoots:
+    Frame: int
+    RegisteredFilters: int
+    AttachedVolumes: int
+
+    def __repr__(self) -> str:
+        return f"FltFrameRoots({hex(self.Frame)})"
+
+
+@dataclass
+class FltRoots:
+    """The filter manager roots.
+
+    `FltGlobals` is `None` when the roots were found by scanning without type information, as the offset of
+    `FrameList` inside `_GLOBALS` is then unknown.
+    """
+
+    FltGlobals: Optional[int]
+    FrameList: int
+    Frames: List[FltFrameRoots] = field(default_factory=list)
+    from_symbols: bool = True
+
+    def __repr__(self) -> str:
+        globals_addr: str = "?" if self.FltGlobals is None else hex(self.FltGlobals)
+        return f"FltRoots({globals_addr}, frames={len(self.Frames)})"
+
+    def list_heads(self) -> List[int]:
+        """Return every `_LIST_ENTRY` head whose entries are `_FLT_OBJECT.PrimaryLink` fields.
+
+        :return: The `RegisteredFilters` and `AttachedVolumes` list heads of every frame.
+        :rtype: List[int]
+        """
+        heads: List[int] = []
+        for frame in self.Frames:
+            heads.append(frame.RegisteredFilters)
+            heads.append(frame.AttachedVolumes)
+        return heads
+
+
+@dataclass
+class _FrameLayout:
+    FrameList: Optional[int]
+    Links: int
+    RegisteredFilters: int
+    AttachedVolumes: int
+
+
+def _build_key(fltmgr: Any) -> Tuple[int, int, int]:
+    return (int(fltmgr.begin()), int(fltmgr.timestamp()), int(fltmgr.checksum()))
+
+
+def _frame_layout_from_types(fltmgr: Any) -> Optional[_FrameLayout]:
+    try:
+        rlist: int = fltmgr.type("_FLT_RESOURCE_LIST_HEAD").fieldOffset("rList")
+        frame: Any = fltmgr.type("_FLT_FRAME")
+        return _FrameLayout(
+            FrameList=fltmgr.type("_GLOBALS").fieldOffset("FrameList") + rlist,
+            Links=frame.fieldOffset("Links"),
+            RegisteredFilters=frame.fieldOffset("RegisteredFilters") + rlist,
+            AttachedVolumes=frame.fieldOffset("AttachedVolumes") + rlist,
+        )
+    except (SymbolException, TypeException):
+        return None
+
+
+def _frame_list_from_symbols(fltmgr: Any, layout: _FrameLayout) -> Optional[int]:
+    try:
+        return int(fltmgr.offset("FltGlobals")) + layout.FrameList
+    except SymbolException:
+        return None
+
+
+def _pool_tag(body: int) -> Optional[bytes]:
+    try:
+        return bytes(loadBytes(body - POOL_HEADER_SIZE + POOL_HEADER_TAG_OFFSET, 4))
+    except MemoryException:
+        return None
+
+
+def _pool_body(address: int, tag: bytes, max_offset: int) -> Optional[int]:
+    """Return the start of the pool allocation tagged `tag` that contains `address`, at most `max_offset` before it."""
+    start: int = address & ~(POOL_HEADER_SIZE - 1)
+    for body in range(start, start - max_offset - 1, -POOL_HEADER_SIZE):
+        if _pool_tag(body) == tag:
+            return body
+    return None
+
+
+def _links_back(entry: int, head: int) -> bool:
+    try:
+        return int(ptrPtr(entry + 8)) == head
+    except MemoryException:
+        return False
+
+
+def _frame_list_from_scan(
+    fltmgr: Any, links_offset: Optional[int]
+) -> Optional[Tuple[int, int]]:
+    """Locate `FltGlobals.FrameList` by scanning the fltmgr image for a list head whose first entry is a frame.
+
+    The frame list head is the `_LIST_ENTRY` inside the fltmgr image whose `Flink` points outside the image, into a
+    pool allocation tagged as a frame, and whose target links back to it. The offset of `Links` inside the frame is
+    learnt from where the allocation starts, so no type information is needed.
+
+    :param links_offset: The offset of `_FLT_FRAME.Links` if it is known from type information.
+    :return: The address of the list head and the offset of `Links` inside `_FLT_FRAME`.
+    """
+    begin: int = int(fltmgr.begin())
+    end: int = int(fltmgr.end())
+
+    for page in range(begin, end, PAGE_SIZE):
+        try:
+            qwords: List[int] = [int(q) for q in loadQWords(page, PAGE_SIZE // 8)]
+        except MemoryException:
+            continue
+
+        for i in range(len(qwords) - 1):
+            flink, blink = qwords[i], qwords[i + 1]
+            if not (is_kernel_pointer(flink) and is_kernel_pointer(blink)):
+                continue
+            if begin <= flink < end:
+                continue
+
+            head: int = page + i * 8
+            if not _links_back(flink, head):
+                continue
+            frame: Optional[int] = _pool_body(
+                flink, FLT_FRAME_POOL_TAG, _INTERNAL_FRAME_LINKS_MAX_OFFSET
+            )
+            if frame is None:
+                continue
+            if links_offset is not None and flink - frame != links_offset:
+                continue
+            return head, flink - frame
+    return None
+
+
+def _walk_frames(frame_list: int, links_offset: int) -> List[int]:
+    """Return the frames on the frame list, stopping at the first unreadable entry, bad pointer or cycle."""
+    frames: List[int] = []
+    seen: Set[int] = {frame_list}
+    try:
+        entry: int = int(ptrPtr(frame_list))
+        while entry not in seen and is_kernel_pointer(entry):
+            seen.add(entry)
+            frames.append(entry - links_offset)
+            entry = int(ptrPtr(entry))
+    except MemoryException:
+        pass
+    return frames
+
+
+def _frame_list_heads_from_scan(frame: int) -> Optional[Tuple[int, int]]:
+    """Find the `RegisteredFilters` and `AttachedVolumes` list heads inside a frame without type information.
+
+    Each is the first `_LIST_ENTRY` in the frame's allocation whose first entry links back to it and is the
+    `PrimaryLink` of an allocation tagged as a filter or as a volume. Empty lists cannot be told apart, so this only
+    succeeds on frames with at least one filter and one volume.
+
+    :return: The offsets of both list heads inside `_FLT_FRAME`.
+    """
+    try:
+        block_size: int = bytes(loadBytes(frame - POOL_HEADER_SIZE + 2, 1))[0]
+        size: int = block_size * POOL_HEADER_SIZE - POOL_HEADER_SIZE
+        if size <= 0:
+            return None
+        qwords: List[int] = [int(q) for q in loadQWords(frame, size // 8)]
+    except MemoryException:
+        return None
+
+    offsets: Dict[bytes, int] = {}
+    for i in range(len(qwords) - 1):
+        flink, blink = qwords[i], qwords[i + 1]
+        head: int = frame + i * 8
+        if flink == head or not (is_kernel_pointer(flink) and is_kernel_pointer(blink)):
+            continue
+        if not _links_back(flink, head):
+            continue
+        tag: Optional[bytes] = _pool_tag(flink - FLT_OBJECT_PRIMARY_LINK_OFFSET)
+        if tag in (FLT_FILTER_POOL_TAG, FLT_VOLUME_POOL_TAG) and tag not in offsets:
+            offsets[tag] = i * 8
+        if len(offsets) == 2:
+            return offsets[FLT_FILTER_POOL_TAG], offsets[FLT_VOLUME_POOL_TAG]
+    return None
+
+
+def discover_roots() -> FltRoots:
+    """Find `FltGlobals`, the frame list and each frame's filter and volume list heads, bypassing the cache.
+
+    Symbols are used when they resolve both fltmgr's types and `FltGlobals`. Otherwise the fltmgr image is scanned for
+    the frame list head. When type information is missing entirely, the frame layout is learnt from the pool
+    allocations the lists point into; `FltRoots.FltGlobals` is then `None`.
+
+    :raises RuntimeError: If the frame list or, without type information, the frame's list heads cannot be found.
+    :return: The discovered roots.
+    :rtype: FltRoots
+    """
+    fltmgr: Any = module("fltmgr")
+    layout: Optional[_FrameLayout] = _frame_layout_from_types(fltmgr)
+
+    frame_list: Optional[int] = None
+    if layout is not None:
+        frame_list = _frame_list_from_symbols(fltmgr, layout)
+    from_symbols: bool = frame_list is not None
+
+    if frame_list is None:
+        found: Optional[Tuple[int, int]] = _frame_list_from_scan(
+            fltmgr, None if layout is None else layout.Links
+        )
+        if found is None:
+            raise RuntimeError("unable to locate the fltmgr frame list")
+        frame_list, links_offset = found
+    else:
+        links_offset = layout.Links
+
+    frames: List[int] = _walk_frames(frame_list, links_offset)
+
+    if layout is None:
+        for frame in frames:
+            heads: Optional[Tuple[int, int]] = _frame_list_heads_from_scan(frame)
+            if heads is not None:
+                layout = _FrameLayout(None, links_offset, *heads)
+                break
+        else:
+            raise RuntimeError("unable to locate the fltmgr frame filter and volume lists")
+
+    return FltRoots(
+        FltGlobals=None if layout.FrameList is None else frame_list - layout.FrameList,
+        FrameList=frame_list,
+        Frames=[
+            FltFrameRoots(
+                Frame=frame,
+                RegisteredFilters=frame + layout.RegisteredFilters,
+                AttachedVolumes=frame + layout.AttachedVolumes,
+            )
+            for frame in frames
+        ],
+        from_symbols=from_symbols,
+    )
+
+
+def get_roots(refresh: bool = False) -> FltRoots:
+    """Return the filter manager roots, discovering them on first use for the loaded fltmgr build.
+
+    :param refresh: Discard the cached roots for the current build and discover them again, e.g. after a frame has
+        been created.
+    :type refresh: bool
+    :return: The cached roots.
+    :rtype: FltRoots
+    """
+    # A fresh `module` object is needed each time: pykd snapshots base, timestamp and checksum on construction.
+    key: Tuple[int, int, int] = _build_key(module("fltmgr"))
+    if refresh or key not in _INTERNAL_ROOTS_CACHE:
+        _INTERNAL_ROOTS_CACHE[key] = discover_roots()
+    return _INTERNAL_ROOTS_CACHE[key]
+
+
+def get_frames() -> List[int]:
+    """Return the address of every `_FLT_FRAME` in the system."""
+    return [frame.Frame for frame in get_roots().Frames]
+
+
+def get_filters() -> List["FLT_OBJECT"]:
+    """Return the base `FLT_OBJECT` of every filter registered in any frame."""
+    from flttoolkit.types import FLT_OBJECT
+
+    return [
+        FLT_OBJECT(int(obj))
+        for frame in get_roots().Frames
+        for obj in typedVarList(
+            frame.RegisteredFilters, "fltmgr!_FLT_OBJECT", "PrimaryLink"
+        )
+    ]
+
+
+def get_volumes() -> List["FLT_VOLUME"]:
+    """Return every `FLT_VOLUME` attached to any frame."""
+    from flttoolkit.types import FLT_VOLUME
+
+    return [
+        FLT_VOLUME(int(obj))
+        for frame in get_roots().Frames
+        for obj in typedVarList(
+            frame.AttachedVolumes, "fltmgr!_FLT_OBJECT", "PrimaryLink"
+        )
+    ]
@@ -0,0 +1,344 @@
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from flttoolkit.constants import (
+    FLT_OBFL_TYPE_FILTER,
+    FLT_OBFL_TYPE_MASK,
+    FLT_OBFL_TYPE_NAMES,
+    FLT_OBFL_TYPE_VOLUME,
+    FLT_OBJECT_HEADER,
+    FLT_OBJECT_PRIMARY_LINK_OFFSET,
+    FLT_POOL_TAGS,
+    LIST_ENTRY,
+    PAGE_SIZE,
+    POOL_HEADER_SIZE,
+    POOL_HEADER_TAG_OFFSET,
+    is_kernel_pointer,
+)
+
+# This module is imported by the scanner worker processes, which run outside the debugger session. It must not
+# import `pykd` (or `flttoolkit.types`, which resolves fltmgr types on import) at module level.
+
+# Bytes past the end of a chunk that must be readable to validate a pool header found at its very end.
+_INTERNAL_SCAN_OVERLAP: int = POOL_HEADER_SIZE + FLT_OBJECT_HEADER.size
+
+DEFAULT_CHUNK_SIZE: int = 64 * 1024 * 1024
+# `pykd.loadBytes` returns a list of ints, so live reads are kept small to bound the debugger's memory use.
+DEFAULT_MEMORY_CHUNK_SIZE: int = 1024 * 1024
+
+
+@dataclass
+class ScanHit:
+    """A pool allocation that looks like a live fltmgr object.
+
+    `address` is the address of the `_FLT_OBJECT` (i.e. just past the pool header). For image scans this is
+    `base + file offset` and `virtual` is `False` unless the caller declared the image a flat dump of virtual memory.
+    `reachable` is `None` until `mark_reachable` has been run against the hit.
+    """
+
+    address: int
+    tag: str
+    object_type: str
+    Flags: int
+    Flink: int
+    Blink: int
+    virtual: bool = True
+    reachable: Optional[bool] = None
+
+    def __repr__(self) -> str:
+        return f"ScanHit({self.object_type}, {hex(self.address)}, reachable={self.reachable})"
+
+
+@dataclass
+class Reachable:
+    """Objects reached by list walking, identified both by address and by their `PrimaryLink` contents.
+
+    The `(Flink, Blink)` pairs identify objects found in images whose offsets cannot be translated to virtual
+    addresses: a linked object's links point at its neighbours, which an unlinked one no longer matches.
+    """
+
+    addresses: Set[int] = field(default_factory=set)
+    links: Set[Tuple[int, int]] = field(default_factory=set)
+
+
+def _find_headers(buf: Union[bytes, memoryview], limit: int) -> List[int]:
+    """Return the offsets of every 16-byte aligned pool header in `buf[:limit]` carrying one of the fltmgr tags."""
+    if np is not None:
+        count: int = limit // POOL_HEADER_SIZE
+        tags: Any = np.frombuffer(buf, dtype="<u4", count=count * 4).reshape(-1, 4)[:, 1]
+        wanted: Any = np.frombuffer(b"".join(FLT_POOL_TAGS), dtype="<u4")
+        return [
+            int(i) * POOL_HEADER_SIZE
+            for i in np.flatnonzero(np.isin(tags, wanted))
+        ]
+
+    data: bytes = bytes(buf[:limit]) if isinstance(buf, memoryview) else buf
+    offsets: List[int] = []
+    for tag in FLT_POOL_TAGS:
+        pos: int = data.find(tag, POOL_HEADER_TAG_OFFSET, limit)
+        while pos != -1:
+            if (pos - POOL_HEADER_TAG_OFFSET) % POOL_HEADER_SIZE == 0:
+                offsets.append(pos - POOL_HEADER_TAG_OFFSET)
+            pos = data.find(tag, pos + 1, limit)
+    offsets.sort()
+    return offsets
+
+
+def scan_buffer(
+    buf: Union[bytes, memoryview],
+    base: int = 0,
+    limit: Optional[int] = None,
+    virtual: bool = True,
+) -> List[ScanHit]:
+    """Scan a raw memory buffer for fltmgr objects.
+
+    Only pool headers that start before `limit` are considered, but their object headers may extend past it; this is
+    what allows consecutive chunks to be scanned with a small overlap without reporting a hit twice.
+
+    :param buf: Raw memory, assumed to start on a 16-byte boundary.
+    :type buf: Union[bytes, memoryview]
+    :param base: Address of the first byte of `buf`.
+    :type base: int
+    :param limit: Number of bytes in which pool headers may start. Defaults to the whole buffer.
+    :type limit: Optional[int]
+    :param virtual: Whether `base` is a virtual address, i.e. whether hit addresses can be compared with pointers.
+    :type virtual: bool
+    :return: Every candidate whose `_FLT_OBJECT_FLAGS` type bit matches its pool tag.
+    :rtype: List[ScanHit]
+    """
+    if limit is None:
+        limit = len(buf)
+    limit = min(limit, len(buf)) & ~(POOL_HEADER_SIZE - 1)
+
+    hits: List[ScanHit] = []
+    for header in _find_headers(buf, limit):
+        obj: int = header + POOL_HEADER_SIZE
+        if obj + FLT_OBJECT_HEADER.size > len(buf):
+            continue
+
+        tag: bytes = bytes(buf[header + POOL_HEADER_TAG_OFFSET : obj - 8])
+        flags, _, _, flink, blink = FLT_OBJECT_HEADER.unpack_from(buf, obj)
+
+        if flags & FLT_OBFL_TYPE_MASK != FLT_POOL_TAGS[tag]:
+            continue
+        if not (is_kernel_pointer(flink) and is_kernel_pointer(blink)):
+            continue
+
+        type_bit: int = flags & FLT_OBFL_TYPE_MASK
+        hits.append(
+            ScanHit(
+                address=base + obj,
+                tag=tag.decode("ascii"),
+                object_type=FLT_OBFL_TYPE_NAMES[type_bit],
+                Flags=flags,
+                Flink=flink,
+                Blink=blink,
+                virtual=virtual,
+            )
+        )
+    return hits
+
+
+def _scan_image_chunk(
+    path: str, offset: int, length: int, base: int, virtual: bool
+) -> List[ScanHit]:
+    with open(path, "rb") as f:
+        size: int = os.fstat(f.fileno()).st_size
+        end: int = min(offset + length + _INTERNAL_SCAN_OVERLAP, size)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view: memoryview = memoryview(mm)[offset:end]
+            try:
+                return scan_buffer(view, base + offset, length, virtual)
+            finally:
+                view.release()
+
+
+def scan_image(
+    path: str,
+    base: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    virtual: bool = False,
+) -> List[ScanHit]:
+    """Scan a dump image on disk for fltmgr objects, splitting the file across worker processes.
+
+    The image is memory mapped in each worker, so no chunk is ever copied between processes.
+
+    :param path: Path of the image to scan.
+    :type path: str
+    :param base: Address corresponding to offset 0 of the image.
+    :type base: int
+    :param chunk_size: Bytes scanned per task. Rounded down to a multiple of the page size.
+    :type chunk_size: int
+    :param workers: Number of worker processes. Defaults to `os.cpu_count()`.
+    :type workers: Optional[int]
+    :param virtual: Set if the image is a flat dump of virtual memory starting at `base`. Otherwise hit addresses are
+        offsets and `mark_reachable` matches them on their links instead.
+    :type virtual: bool
+    :return: Every candidate found, ordered by address.
+    :rtype: List[ScanHit]
+    """
+    chunk_size = max(chunk_size & ~(PAGE_SIZE - 1), PAGE_SIZE)
+    size: int = os.path.getsize(path)
+    offsets: List[int] = list(range(0, size, chunk_size))
+
+    hits: List[ScanHit] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_hits in pool.map(
+            _scan_image_chunk,
+            [path] * len(offsets),
+            offsets,
+            [chunk_size] * len(offsets),
+            [base] * len(offsets),
+            [virtual] * len(offsets),
+        ):
+            hits.extend(chunk_hits)
+    return hits
+
+
+def scan_memory(
+    start: int, length: int, chunk_size: int = DEFAULT_MEMORY_CHUNK_SIZE
+) -> List[ScanHit]:
+    """Scan a range of the debuggee's virtual memory for fltmgr objects.
+
+    Memory is read through the debugger session, which cannot be shared with worker processes, so this runs in the
+    calling process. Chunks that cannot be read as a whole are retried page by page and unreadable pages are skipped.
+
+    :param start: First address to scan. Rounded down to a page boundary.
+    :type start: int
+    :param length: Number of bytes to scan.
+    :type length: int
+    :param chunk_size: Bytes read from the debuggee per request.
+    :type chunk_size: int
+    :return: Every candidate found, ordered by address.
+    :rtype: List[ScanHit]
+    """
+    from pykd import loadBytes, MemoryException
+
+    def _read(addr: int, size: int) -> Optional[bytes]:
+        try:
+            return bytes(loadBytes(addr, size))
+        except MemoryException:
+            return None
+
+    chunk_size = max(chunk_size & ~(PAGE_SIZE - 1), PAGE_SIZE)
+    end: int = start + length
+    start &= ~(PAGE_SIZE - 1)
+
+    hits: List[ScanHit] = []
+    for chunk in range(start, end, chunk_size):
+        size: int = min(chunk_size, end - chunk)
+        buf: Optional[bytes] = _read(chunk, size + _INTERNAL_SCAN_OVERLAP) or _read(chunk, size)
+        if buf is not None:
+            hits.extend(scan_buffer(buf, chunk, size))
+            continue
+
+        for page in range(chunk, chunk + size, PAGE_SIZE):
+            buf = _read(page, PAGE_SIZE)
+            if buf is not None:
+                hits.extend(scan_buffer(buf, page))
+    return hits
+
+
+def walk_reachable(list_heads: Optional[Iterable[int]] = None) -> Reachable:
+    """Collect every `_FLT_OBJECT` reachable by walking `PrimaryLink` lists from `list_heads`.
+
+    Volumes found along the way have their `InstanceList` walked, and filters have theirs walked through
+    `_FLT_INSTANCE.FilterLink`, so an instance linked from either side counts as reachable. Each list is walked with a
+    set of seen entries and stops at its first unreadable entry, non-kernel pointer or cycle, so a broken list only
+    loses its own tail.
+
+    :param list_heads: Addresses of `_LIST_ENTRY` heads whose entries are `_FLT_OBJECT.PrimaryLink` fields, such as a
+        frame's `RegisteredFilters.rList` and `AttachedVolumes.rList`. Defaults to the list heads of every frame,
+        as returned by `flttoolkit.roots.get_roots`.
+    :type list_heads: Optional[Iterable[int]]
+    :raises RuntimeError: If the symbols do not carry fltmgr's types.
+    :return: The address and `PrimaryLink` contents of every reachable `_FLT_OBJECT`.
+    :rtype: Reachable
+    """
+    from pykd import module, loadBytes, MemoryException, SymbolException, TypeException
+    from flttoolkit.roots import get_roots
+
+    if list_heads is None:
+        list_heads = get_roots().list_heads()
+
+    fltmgr: Any = module("fltmgr")
+    try:
+        rlist: int = fltmgr.type("_FLT_RESOURCE_LIST_HEAD").fieldOffset("rList")
+        volume_instances: int = fltmgr.type("_FLT_VOLUME").fieldOffset("InstanceList") + rlist
+        filter_instances: int = fltmgr.type("_FLT_FILTER").fieldOffset("InstanceList") + rlist
+        filter_link: int = fltmgr.type("_FLT_INSTANCE").fieldOffset("FilterLink")
+    except (SymbolException, TypeException) as e:
+        raise RuntimeError("fltmgr type information is required to walk the filter manager lists") from e
+
+    def _read(address: int, layout: struct.Struct) -> Optional[Tuple[int, ...]]:
+        try:
+            return layout.unpack(bytes(loadBytes(address, layout.size)))
+        except MemoryException:
+            return None
+
+    def _entries(head: int) -> List[int]:
+        entries: List[int] = []
+        seen: Set[int] = {head}
+        links: Optional[Tuple[int, ...]] = _read(head, LIST_ENTRY)
+        while links is not None:
+            entry: int = links[0]
+            if entry in seen or not is_kernel_pointer(entry):
+                break
+            seen.add(entry)
+            entries.append(entry)
+            links = _read(entry, LIST_ENTRY)
+        return entries
+
+    reachable: Reachable = Reachable()
+    # (list head, offset of the `_LIST_ENTRY` the objects on the list are linked through)
+    pending: List[Tuple[int, int]] = [
+        (head, FLT_OBJECT_PRIMARY_LINK_OFFSET) for head in list_heads
+    ]
+    while pending:
+        head, link_offset = pending.pop()
+        for entry in _entries(head):
+            obj: int = entry - link_offset
+            if obj in reachable.addresses:
+                continue
+            header: Optional[Tuple[int, ...]] = _read(obj, FLT_OBJECT_HEADER)
+            if header is None:
+                continue
+
+            flags, _, _, flink, blink = header
+            reachable.addresses.add(obj)
+            reachable.links.add((flink, blink))
+            if flags & FLT_OBFL_TYPE_VOLUME:
+                pending.append((obj + volume_instances, FLT_OBJECT_PRIMARY_LINK_OFFSET))
+            elif flags & FLT_OBFL_TYPE_FILTER:
+                pending.append((obj + filter_instances, filter_link))
+    return reachable
+
+
+def mark_reachable(hits: Iterable[ScanHit], reachable: Reachable) -> List[ScanHit]:
+    """Set `ScanHit.reachable` on every hit according to `reachable`.
+
+    Hits with a virtual address are matched by address. Image hits whose offsets have no translation are matched on
+    their `(Flink, Blink)` pair.
+
+    :return: The hits that list walking cannot reach.
+    :rtype: List[ScanHit]
+    """
+    unlinked: List[ScanHit] = []
+    for hit in hits:
+        if hit.virtual:
+            hit.reachable = hit.address in reachable.addresses
+        else:
+            hit.reachable = (hit.Flink, hit.Blink) in reachable.links
+        if not hit.reachable:
+            unlinked.append(hit)
+    return unlinked
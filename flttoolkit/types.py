@@ -4,10 +4,12 @@ from typing import *
 from dataclasses import dataclass
 from functools import cache
 
+from flttoolkit.constants import FLT_OBJECT_PRIMARY_LINK_OFFSET
+
 # Cache types for to prevent redundant lookups. These fields should not be accessed directly.
 _INTERNAL_FLT_MGR: Any = module("fltmgr")
 _INTERNAL_FLT_OBJECT: Any = _INTERNAL_FLT_MGR.type("_FLT_OBJECT")
-_INTERNAL_FLT_OBJECT_PRIMARY_LINK_OFFSET: int = 0x10
+_INTERNAL_FLT_OBJECT_PRIMARY_LINK_OFFSET: int = FLT_OBJECT_PRIMARY_LINK_OFFSET
 
 _INTERNAL_FLT_VOLUME: Any = _INTERNAL_FLT_MGR.type("_FLT_VOLUME")
 
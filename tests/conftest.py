@@ -0,0 +1,184 @@
+import struct
+import sys
+import types
+from typing import *
+
+import pytest
+
+PAGE: int = 0x1000
+KERNEL: int = 0xFFFF900000000000
+
+# Modules that bind `pykd` names at import time and must be re-imported against each stub.
+_PYKD_MODULES: Tuple[str, ...] = ("flttoolkit.types", "flttoolkit.roots", "flttoolkit.integrity")
+
+
+class MemoryException(Exception):
+    pass
+
+
+class SymbolException(Exception):
+    pass
+
+
+class TypeException(Exception):
+    pass
+
+
+class StubType:
+    def __init__(self, offsets: Dict[str, int], fields: Optional[Dict[str, "StubType"]] = None) -> None:
+        self._offsets = offsets
+        self._fields = fields or {}
+
+    def fieldOffset(self, name: str) -> int:
+        if name not in self._offsets:
+            raise TypeException(name)
+        return self._offsets[name]
+
+    def field(self, name: str) -> "StubType":
+        return self._fields[name]
+
+
+def default_types() -> Dict[str, StubType]:
+    tree: StubType = StubType({"Tree": 0x8})
+    return {
+        "_FLT_RESOURCE_LIST_HEAD": StubType({"rList": 0x68}),
+        "_GLOBALS": StubType({"FrameList": 0x58}),
+        "_FLT_FRAME": StubType({"Links": 0x8, "RegisteredFilters": 0x48, "AttachedVolumes": 0xC8}),
+        "_FLT_FILTER": StubType({"InstanceList": 0x80}),
+        "_FLT_VOLUME": StubType(
+            {"InstanceList": 0x100, "TxVolContexts": 0x200}, {"TxVolContexts": tree}
+        ),
+        "_FLT_INSTANCE": StubType(
+            {"Volume": 0x28, "Filter": 0x30, "FilterLink": 0x48, "TransactionContexts": 0x80},
+            {"TransactionContexts": tree},
+        ),
+    }
+
+
+class PykdStub:
+    """A dict-backed stand-in for the handful of `pykd` entry points the toolkit uses outside `flttoolkit.types`.
+
+    `module("fltmgr")` snapshots `begin`, `end`, `timestamp` and `checksum` when it is constructed, like pykd does.
+    """
+
+    def __init__(self) -> None:
+        self.pages: Dict[int, bytearray] = {}
+        self.types: Optional[Dict[str, StubType]] = default_types()
+        self.symbols: Dict[str, int] = {}
+        self.begin: int = 0xFFFFF80000000000
+        self.end: int = self.begin + 4 * PAGE
+        self.timestamp: int = 0x1234
+        self.checksum: int = 0x5678
+        self.module: types.ModuleType = self._build_module()
+
+    # Memory model
+
+    def map(self, address: int, size: int = PAGE) -> None:
+        for page in range(address & ~(PAGE - 1), address + size, PAGE):
+            self.pages.setdefault(page, bytearray(PAGE))
+
+    def unmap(self, address: int) -> None:
+        self.pages.pop(address & ~(PAGE - 1), None)
+
+    def write(self, address: int, fmt: str, *values: Any) -> None:
+        data: bytes = struct.pack(fmt, *values)
+        self.map(address, len(data))
+        for i, b in enumerate(data):
+            self.pages[(address + i) & ~(PAGE - 1)][(address + i) & (PAGE - 1)] = b
+
+    def read(self, address: int, size: int) -> bytes:
+        out: bytearray = bytearray()
+        for a in range(address, address + size):
+            page: Optional[bytearray] = self.pages.get(a & ~(PAGE - 1))
+            if page is None:
+                raise MemoryException(hex(a))
+            out.append(page[a & (PAGE - 1)])
+        return bytes(out)
+
+    def link(self, head: int, entries: List[int]) -> None:
+        """Write a well-formed circular `_LIST_ENTRY` list through `head` and `entries`."""
+        chain: List[int] = [head] + entries
+        for i, entry in enumerate(chain):
+            self.write(entry, "<QQ", chain[(i + 1) % len(chain)], chain[i - 1])
+
+    def pool(self, body: int, tag: bytes, size: int = 0x100) -> None:
+        """Write an x64 pool header in front of `body`."""
+        self.write(body - 0x10, "<BBBB4s", 0, 0, (size + 0x10) // 0x10, 0, tag)
+
+    # pykd surface
+
+    def _build_module(self) -> types.ModuleType:
+        stub: PykdStub = self
+        mod: types.ModuleType = types.ModuleType("pykd")
+
+        class module:
+            def __init__(self, name: str) -> None:
+                self._begin, self._end = stub.begin, stub.end
+                self._timestamp, self._checksum = stub.timestamp, stub.checksum
+
+            def begin(self) -> int:
+                return self._begin
+
+            def end(self) -> int:
+                return self._end
+
+            def timestamp(self) -> int:
+                return self._timestamp
+
+            def checksum(self) -> int:
+                return self._checksum
+
+            def offset(self, name: str) -> int:
+                if name not in stub.symbols:
+                    raise SymbolException(name)
+                return stub.symbols[name]
+
+            def type(self, name: str) -> StubType:
+                if stub.types is None or name not in stub.types:
+                    raise TypeException(name)
+                return stub.types[name]
+
+        def loadBytes(address: int, count: int) -> List[int]:
+            return list(stub.read(address, count))
+
+        def loadQWords(address: int, count: int) -> List[int]:
+            return list(struct.unpack(f"<{count}Q", stub.read(address, count * 8)))
+
+        def ptrPtr(address: int) -> int:
+            return struct.unpack("<Q", stub.read(address, 8))[0]
+
+        def typedVarList(head: int, type_name: str, field_name: str) -> List[int]:
+            offset: int = stub.module.module("fltmgr").type(type_name.split("!")[-1]).fieldOffset(field_name)
+            entries: List[int] = []
+            entry: int = ptrPtr(int(head))
+            while entry != int(head):
+                entries.append(entry - offset)
+                entry = ptrPtr(entry)
+            return entries
+
+        mod.module = module
+        mod.loadBytes = loadBytes
+        mod.loadQWords = loadQWords
+        mod.ptrPtr = ptrPtr
+        mod.typedVarList = typedVarList
+        mod.MemoryException = MemoryException
+        mod.SymbolException = SymbolException
+        mod.TypeException = TypeException
+        return mod
+
+
+def _forget_pykd_modules() -> None:
+    import flttoolkit
+
+    for name in _PYKD_MODULES:
+        sys.modules.pop(name, None)
+        flttoolkit.__dict__.pop(name.rpartition(".")[2], None)
+
+
+@pytest.fixture
+def pykd_stub(monkeypatch) -> Iterator[PykdStub]:
+    stub: PykdStub = PykdStub()
+    _forget_pykd_modules()
+    monkeypatch.setitem(sys.modules, "pykd", stub.module)
+    yield stub
+    _forget_pykd_modules()
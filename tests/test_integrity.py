@@ -0,0 +1,300 @@
+import json
+
+import pytest
+
+from conftest import KERNEL, PAGE
+
+INSTANCE: int = 0x1000000
+FILTER: int = 0x2000000
+VOLUME: int = 0x4000000
+
+# Offsets match `conftest.default_types`.
+INSTANCE_VOLUME: int = 0x28
+INSTANCE_FILTER: int = 0x30
+INSTANCE_FILTER_LINK: int = 0x48
+INSTANCE_TX_TREE: int = 0x88
+FILTER_INSTANCES: int = 0x80 + 0x68
+VOLUME_INSTANCES: int = 0x100 + 0x68
+VOLUME_TX_TREE: int = 0x208
+
+
+@pytest.fixture
+def integrity(pykd_stub):
+    from flttoolkit import integrity
+
+    return integrity
+
+
+def _kinds(report):
+    return [(v.kind, v.address) for v in report.violations]
+
+
+def _object(stub, address: int, flags: int) -> None:
+    stub.map(address, 0x400)
+    stub.write(address, "<I", flags)
+
+
+class System:
+    """One frame with a filter, a volume and two instances linked from both sides."""
+
+    def __init__(self, stub) -> None:
+        from flttoolkit.roots import FltFrameRoots, FltRoots
+
+        self.stub = stub
+        self.frame = KERNEL
+        self.filters_head = self.frame + 0x100
+        self.volumes_head = self.frame + 0x200
+        self.filter = KERNEL + 0x1000
+        self.volume = KERNEL + 0x2000
+        self.instances = [KERNEL + 0x3000, KERNEL + 0x3400]
+
+        _object(stub, self.filter, FILTER)
+        _object(stub, self.volume, VOLUME)
+        for instance in self.instances:
+            _object(stub, instance, INSTANCE)
+            stub.write(instance + INSTANCE_VOLUME, "<Q", self.volume)
+            stub.write(instance + INSTANCE_FILTER, "<Q", self.filter)
+        stub.link(self.filters_head, [self.filter + 0x10])
+        stub.link(self.volumes_head, [self.volume + 0x10])
+        stub.link(self.volume + VOLUME_INSTANCES, [i + 0x10 for i in self.instances])
+        stub.link(self.filter + FILTER_INSTANCES, [i + INSTANCE_FILTER_LINK for i in self.instances])
+
+        self.roots = FltRoots(None, 0, [FltFrameRoots(self.frame, self.filters_head, self.volumes_head)])
+
+
+def test_well_formed_system_is_clean(integrity, pykd_stub):
+    system = System(pykd_stub)
+
+    report = integrity.check_integrity(system.roots)
+
+    assert report.ok, report.violations
+    # Instances sit on two lists but are counted once.
+    assert report.objects_checked == 4
+
+
+def test_check_list_well_formed(integrity, pykd_stub):
+    head = KERNEL + 0x10
+    objects = [KERNEL + 0x1000, KERNEL + 0x1400, KERNEL + 0x1800]
+    for obj in objects:
+        _object(pykd_stub, obj, VOLUME)
+    pykd_stub.link(head, [obj + 0x10 for obj in objects])
+    report = integrity.IntegrityReport()
+
+    assert integrity._check_list(integrity._PageCache(), head, 0x10, VOLUME, "list", report) == objects
+    assert report.ok and report.objects_checked == 3
+
+
+def test_check_list_blink_mismatch(integrity, pykd_stub):
+    head = KERNEL + 0x10
+    a, b = KERNEL + 0x1000, KERNEL + 0x1400
+    for obj in (a, b):
+        _object(pykd_stub, obj, VOLUME)
+    pykd_stub.link(head, [a + 0x10, b + 0x10])
+    pykd_stub.write(b + 0x18, "<Q", head)
+    report = integrity.IntegrityReport()
+
+    assert integrity._check_list(integrity._PageCache(), head, 0x10, VOLUME, "list", report) == [a, b]
+    assert _kinds(report) == [("blink_mismatch", b + 0x10)]
+    assert (report.violations[0].expected, report.violations[0].actual) == (a + 0x10, head)
+
+
+def test_check_list_cycle_not_through_head(integrity, pykd_stub):
+    head = KERNEL + 0x10
+    a, b = KERNEL + 0x1000, KERNEL + 0x1400
+    for obj in (a, b):
+        _object(pykd_stub, obj, VOLUME)
+    pykd_stub.write(head, "<QQ", a + 0x10, b + 0x10)
+    pykd_stub.write(a + 0x10, "<QQ", b + 0x10, head)
+    pykd_stub.write(b + 0x10, "<QQ", a + 0x10, a + 0x10)
+    report = integrity.IntegrityReport()
+
+    assert integrity._check_list(integrity._PageCache(), head, 0x10, VOLUME, "list", report) == [a, b]
+    assert _kinds(report) == [("cycle", b + 0x10)]
+    assert report.violations[0].actual == a + 0x10
+
+
+def test_check_list_bad_flink(integrity, pykd_stub):
+    head = KERNEL + 0x10
+    a = KERNEL + 0x1000
+    _object(pykd_stub, a, VOLUME)
+    pykd_stub.write(head, "<QQ", a + 0x10, a + 0x10)
+    pykd_stub.write(a + 0x10, "<QQ", 0x10000, head)
+    report = integrity.IntegrityReport()
+
+    assert integrity._check_list(integrity._PageCache(), head, 0x10, VOLUME, "list", report) == [a]
+    assert _kinds(report) == [("bad_flink", a + 0x10)]
+    assert report.violations[0].actual == 0x10000
+
+
+def test_check_list_type_mismatch_is_not_returned(integrity, pykd_stub):
+    head = KERNEL + 0x10
+    a, b = KERNEL + 0x1000, KERNEL + 0x1400
+    _object(pykd_stub, a, FILTER)
+    _object(pykd_stub, b, VOLUME)
+    pykd_stub.link(head, [a + 0x10, b + 0x10])
+    report = integrity.IntegrityReport()
+
+    assert integrity._check_list(integrity._PageCache(), head, 0x10, VOLUME, "list", report) == [b]
+    assert _kinds(report) == [("type_mismatch", a)]
+    assert (report.violations[0].expected, report.violations[0].actual) == (VOLUME, FILTER)
+
+
+def test_check_list_unreadable(integrity, pykd_stub):
+    head = KERNEL + 0x10
+    a, gone = KERNEL + 0x1000, KERNEL + 0x8000
+    _object(pykd_stub, a, VOLUME)
+    pykd_stub.link(head, [a + 0x10, gone + 0x10])
+    pykd_stub.unmap(gone)
+    report = integrity.IntegrityReport()
+
+    assert integrity._check_list(integrity._PageCache(), head, 0x10, VOLUME, "list", report) == [a]
+    assert _kinds(report) == [("unreadable", gone + 0x10)]
+
+    report = integrity.IntegrityReport()
+    assert integrity._check_list(integrity._PageCache(), KERNEL + 0x9000, 0x10, VOLUME, "list", report) == []
+    assert _kinds(report) == [("unreadable", KERNEL + 0x9000)]
+
+
+def test_page_cache_reads_across_pages_and_remembers_holes(integrity, pykd_stub):
+    pykd_stub.write(KERNEL + PAGE - 4, "<Q", 0x1122334455667788)
+    cache = integrity._PageCache()
+
+    assert cache.read_pointer(KERNEL + PAGE - 4) == 0x1122334455667788
+    assert cache.read(KERNEL + 2 * PAGE - 4, 8) is None
+
+    pykd_stub.map(KERNEL + 2 * PAGE)
+    assert cache.read(KERNEL + 2 * PAGE, 8) is None
+
+
+def test_volume_side_backpointers(integrity, pykd_stub):
+    system = System(pykd_stub)
+    first, second = system.instances
+    pykd_stub.write(first + INSTANCE_VOLUME, "<Q", KERNEL + 0x7000)
+    pykd_stub.write(second + INSTANCE_FILTER, "<Q", KERNEL + 0x7400)
+
+    report = integrity.check_integrity(system.roots)
+
+    structure = f"volume {hex(system.volume)} InstanceList"
+    volume_side = [(v.kind, v.address) for v in report.violations if v.structure == structure]
+    assert volume_side == [("instance_volume_mismatch", first), ("instance_filter_not_live", second)]
+
+
+def test_filter_side_backpointers(integrity, pykd_stub):
+    system = System(pykd_stub)
+    first, second = system.instances
+    pykd_stub.write(first + INSTANCE_FILTER, "<Q", KERNEL + 0x7000)
+    pykd_stub.write(second + INSTANCE_VOLUME, "<Q", KERNEL + 0x7400)
+
+    report = integrity.check_integrity(system.roots)
+
+    structure = f"filter {hex(system.filter)} InstanceList"
+    filter_side = [(v.kind, v.address) for v in report.violations if v.structure == structure]
+    assert filter_side == [("instance_filter_mismatch", first), ("instance_volume_not_live", second)]
+
+
+def test_filter_instance_list_is_walked(integrity, pykd_stub):
+    system = System(pykd_stub)
+    first = system.instances[0]
+    pykd_stub.write(first + INSTANCE_FILTER_LINK + 8, "<Q", KERNEL + 0x5550)
+
+    report = integrity.check_integrity(system.roots)
+
+    assert _kinds(report) == [("blink_mismatch", first + INSTANCE_FILTER_LINK)]
+
+
+def test_unreadable_and_mistyped_volumes_do_not_abort(integrity, pykd_stub):
+    system = System(pykd_stub)
+    # Straddles a page boundary: the links are readable but the instance list head and context tree are not.
+    torn = KERNEL + PAGE * 5 + 0xF00
+    other = KERNEL + 0x7000
+    pykd_stub.write(torn, "<I", VOLUME)
+    _object(pykd_stub, other, FILTER)
+    pykd_stub.link(system.volumes_head, [system.volume + 0x10, torn + 0x10, other + 0x10])
+    pykd_stub.unmap(torn + VOLUME_INSTANCES)
+
+    report = integrity.check_integrity(system.roots)
+
+    assert sorted(_kinds(report)) == sorted(
+        [
+            ("type_mismatch", other),
+            ("unreadable", torn + VOLUME_INSTANCES),
+            ("unreadable", torn + VOLUME_TX_TREE),
+        ]
+    )
+
+
+def _splay(stub, node: int, parent: int, left: int = 0, right: int = 0) -> None:
+    stub.write(node, "<QQQ", parent, left, right)
+
+
+def test_splay_tree_checks(integrity, pykd_stub):
+    holder, root, left, right = KERNEL + 0x8, KERNEL + 0x100, KERNEL + 0x200, KERNEL + 0x300
+    pykd_stub.write(holder, "<Q", root)
+    _splay(pykd_stub, root, root, left, right)
+    _splay(pykd_stub, left, root, 0x10000)
+    _splay(pykd_stub, right, left, 0, root)
+    report = integrity.IntegrityReport()
+
+    assert integrity._check_splay_tree(integrity._PageCache(), holder, "tree", report) == 2
+    assert sorted(_kinds(report)) == sorted(
+        [("bad_child", left), ("tree_parent_mismatch", right), ("tree_cycle", right)]
+    )
+    assert report.tree_nodes_checked == 3 and report.tree_max_height == 2
+
+
+def test_splay_tree_bad_root(integrity, pykd_stub):
+    holder = KERNEL + 0x8
+    pykd_stub.write(holder, "<Q", 0x10000)
+    report = integrity.IntegrityReport()
+
+    assert integrity._check_splay_tree(integrity._PageCache(), holder, "tree", report) == 0
+    assert _kinds(report) == [("bad_child", holder)]
+
+
+def test_instance_transaction_contexts_are_checked(integrity, pykd_stub):
+    system = System(pykd_stub)
+    instance = system.instances[1]
+    root = KERNEL + 0x4000
+    pykd_stub.write(instance + INSTANCE_TX_TREE, "<Q", root)
+    _splay(pykd_stub, root, KERNEL + 0x4100)
+
+    report = integrity.check_integrity(system.roots)
+
+    assert [(v.kind, v.structure) for v in report.violations] == [
+        ("tree_parent_mismatch", f"instance {hex(instance)} TransactionContexts")
+    ]
+    assert report.tree_nodes_checked == 1
+
+
+def test_layout_requires_types(integrity, pykd_stub):
+    pykd_stub.types = None
+
+    with pytest.raises(RuntimeError):
+        integrity._layout()
+
+
+def test_to_json_emits_hex_addresses(integrity):
+    report = integrity.IntegrityReport(objects_checked=2)
+    report.add("blink_mismatch", "volume 0x10 InstanceList", 0xFFFF900000000010, expected=0x20, actual=0x30)
+    report.add("cycle", "frame 0x40 AttachedVolumes", 0xFFFF900000000050)
+
+    doc = json.loads(report.to_json())
+
+    assert not doc["ok"] and doc["objects_checked"] == 2
+    assert doc["violations"] == [
+        {
+            "kind": "blink_mismatch",
+            "structure": "volume 0x10 InstanceList",
+            "address": "0xffff900000000010",
+            "expected": "0x20",
+            "actual": "0x30",
+        },
+        {
+            "kind": "cycle",
+            "structure": "frame 0x40 AttachedVolumes",
+            "address": "0xffff900000000050",
+            "expected": None,
+            "actual": None,
+        },
+    ]
+    assert json.loads(integrity.IntegrityReport().to_json())["ok"]
@@ -0,0 +1,122 @@
+import pytest
+
+from conftest import KERNEL, PAGE
+
+# Offsets match `conftest.default_types`.
+GLOBALS_FRAME_LIST: int = 0x58 + 0x68
+FRAME_LINKS: int = 0x8
+FRAME_FILTERS: int = 0x48 + 0x68
+FRAME_VOLUMES: int = 0xC8 + 0x68
+
+
+class System:
+    """A frame with one filter and one volume, reachable from `FltGlobals` inside the fltmgr image."""
+
+    def __init__(self, stub) -> None:
+        stub.map(stub.begin, stub.end - stub.begin)
+        self.globals = stub.begin + 2 * PAGE
+        self.head = self.globals + GLOBALS_FRAME_LIST
+        self.frame = KERNEL + 0x10000
+        self.filter = KERNEL + 0x20000
+        self.volume = KERNEL + 0x30000
+
+        stub.pool(self.frame, b"FMfr", 0x200)
+        stub.pool(self.filter, b"FMfl")
+        stub.pool(self.volume, b"FMvo")
+        stub.write(self.filter, "<I", 0x2000000)
+        stub.write(self.volume, "<I", 0x4000000)
+        stub.link(self.head, [self.frame + FRAME_LINKS])
+        stub.link(self.frame + FRAME_FILTERS, [self.filter + 0x10])
+        stub.link(self.frame + FRAME_VOLUMES, [self.volume + 0x10])
+
+
+def _assert_frame(roots, system) -> None:
+    assert roots.FrameList == system.head
+    assert [f.Frame for f in roots.Frames] == [system.frame]
+    assert roots.Frames[0].RegisteredFilters == system.frame + FRAME_FILTERS
+    assert roots.Frames[0].AttachedVolumes == system.frame + FRAME_VOLUMES
+    assert roots.list_heads() == [system.frame + FRAME_FILTERS, system.frame + FRAME_VOLUMES]
+
+
+def test_discover_roots_from_symbols(pykd_stub):
+    system = System(pykd_stub)
+    pykd_stub.symbols["FltGlobals"] = system.globals
+    from flttoolkit import roots
+
+    found = roots.discover_roots()
+
+    assert found.from_symbols and found.FltGlobals == system.globals
+    _assert_frame(found, system)
+
+
+def test_discover_roots_scans_without_fltglobals_symbol(pykd_stub):
+    system = System(pykd_stub)
+    from flttoolkit import roots
+
+    found = roots.discover_roots()
+
+    assert not found.from_symbols and found.FltGlobals == system.globals
+    _assert_frame(found, system)
+
+
+def test_discover_roots_scans_without_any_symbols(pykd_stub):
+    system = System(pykd_stub)
+    pykd_stub.types = None
+    from flttoolkit import roots
+
+    found = roots.discover_roots()
+
+    assert not found.from_symbols and found.FltGlobals is None
+    _assert_frame(found, system)
+
+
+def test_scan_rejects_decoy_list_heads(pykd_stub):
+    system = System(pykd_stub)
+    image = pykd_stub.begin
+    # A list whose entry lives inside the image.
+    pykd_stub.link(image + 0x100, [image + 0x200])
+    # A list head whose target does not link back to it.
+    pykd_stub.write(image + 0x300, "<QQ", system.frame + FRAME_LINKS, system.frame + FRAME_LINKS)
+    # A well-formed list whose entry is not inside a frame allocation.
+    other = KERNEL + 0x40000
+    pykd_stub.pool(other, b"FMvo")
+    pykd_stub.link(image + 0x400, [other + 0x10])
+    from flttoolkit import roots
+
+    assert roots._frame_list_from_scan(roots.module("fltmgr"), None) == (system.head, FRAME_LINKS)
+
+
+def test_scan_requires_known_links_offset_to_match(pykd_stub):
+    System(pykd_stub)
+    from flttoolkit import roots
+
+    assert roots._frame_list_from_scan(roots.module("fltmgr"), FRAME_LINKS + 8) is None
+
+
+def test_discover_roots_fails_without_frame_list(pykd_stub):
+    pykd_stub.map(pykd_stub.begin, pykd_stub.end - pykd_stub.begin)
+    from flttoolkit import roots
+
+    with pytest.raises(RuntimeError):
+        roots.discover_roots()
+
+
+def test_get_roots_caches_per_build(pykd_stub, monkeypatch):
+    System(pykd_stub)
+    from flttoolkit import roots
+
+    monkeypatch.setattr(roots, "_INTERNAL_ROOTS_CACHE", {})
+    calls = []
+    discover = roots.discover_roots
+    monkeypatch.setattr(roots, "discover_roots", lambda: calls.append(1) or discover())
+
+    first = roots.get_roots()
+    assert roots.get_roots() is first and len(calls) == 1
+
+    pykd_stub.timestamp += 1
+    rebuilt = roots.get_roots()
+    assert rebuilt is not first and len(calls) == 2
+
+    refreshed = roots.get_roots(refresh=True)
+    assert refreshed is not rebuilt and len(calls) == 3
+    assert roots.get_roots() is refreshed
@@ -0,0 +1,162 @@
+import struct
+
+import pytest
+
+from flttoolkit import scanner
+from flttoolkit.constants import (
+    FLT_OBFL_TYPE_FILTER,
+    FLT_OBFL_TYPE_INSTANCE,
+    FLT_OBFL_TYPE_VOLUME,
+    PAGE_SIZE,
+)
+
+FLINK: int = 0xFFFF800012345670
+BLINK: int = 0xFFFF800012345680
+
+
+def _put(buf: bytearray, header: int, tag: bytes, flags: int, flink: int = FLINK, blink: int = BLINK) -> None:
+    buf[header + 4 : header + 8] = tag
+    struct.pack_into("<IIQQQ", buf, header + 0x10, flags, 1, 0, flink, blink)
+
+
+@pytest.fixture(params=["numpy", "find"])
+def search_path(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(scanner, "np", None)
+    return request.param
+
+
+def test_matching_tag_and_type(search_path):
+    buf = bytearray(PAGE_SIZE)
+    _put(buf, 0x100, b"FMvo", FLT_OBFL_TYPE_VOLUME)
+    _put(buf, 0x200, b"FMis", FLT_OBFL_TYPE_INSTANCE | 1)
+
+    hits = scanner.scan_buffer(bytes(buf), 0xFFFF900000000000)
+
+    assert [(h.address, h.object_type) for h in hits] == [
+        (0xFFFF900000000110, "FLT_VOLUME"),
+        (0xFFFF900000000210, "FLT_INSTANCE"),
+    ]
+    assert hits[0].Flink == FLINK and hits[0].Blink == BLINK
+
+
+def test_rejects_type_mismatch(search_path):
+    buf = bytearray(PAGE_SIZE)
+    _put(buf, 0x100, b"FMvo", FLT_OBFL_TYPE_INSTANCE)
+    _put(buf, 0x200, b"FMfl", FLT_OBFL_TYPE_FILTER | FLT_OBFL_TYPE_VOLUME)
+
+    assert scanner.scan_buffer(bytes(buf)) == []
+
+
+def test_rejects_misaligned_header_and_bad_links(search_path):
+    buf = bytearray(PAGE_SIZE)
+    _put(buf, 0x108, b"FMvo", FLT_OBFL_TYPE_VOLUME)
+    _put(buf, 0x200, b"FMfl", FLT_OBFL_TYPE_FILTER, flink=0x1234)
+    _put(buf, 0x300, b"FMfl", FLT_OBFL_TYPE_FILTER, blink=FLINK + 1)
+
+    assert scanner.scan_buffer(bytes(buf)) == []
+
+
+@pytest.mark.parametrize("size", [0, 4, 0x10, 0x2F])
+def test_empty_and_short_buffers(search_path, size):
+    buf = bytearray(size)
+    if size >= 8:
+        buf[4:8] = b"FMvo"
+
+    assert scanner.scan_buffer(bytes(buf)) == []
+
+
+def test_limit_excludes_headers_past_the_chunk(search_path):
+    buf = bytearray(2 * PAGE_SIZE)
+    _put(buf, PAGE_SIZE - 0x10, b"FMfl", FLT_OBFL_TYPE_FILTER)
+    _put(buf, PAGE_SIZE + 0x40, b"FMvo", FLT_OBFL_TYPE_VOLUME)
+
+    hits = scanner.scan_buffer(bytes(buf), limit=PAGE_SIZE)
+
+    assert [h.address for h in hits] == [PAGE_SIZE]
+
+
+def test_scan_image_chunk_boundary(tmp_path):
+    buf = bytearray(3 * PAGE_SIZE)
+    # The first object straddles the chunk boundary and must be reported exactly once.
+    _put(buf, PAGE_SIZE - 0x10, b"FMis", FLT_OBFL_TYPE_INSTANCE)
+    _put(buf, PAGE_SIZE + 0x40, b"FMvo", FLT_OBFL_TYPE_VOLUME)
+    _put(buf, 3 * PAGE_SIZE - 0x30, b"FMfl", FLT_OBFL_TYPE_FILTER)
+    image = tmp_path / "image.bin"
+    image.write_bytes(bytes(buf))
+
+    hits = scanner.scan_image(str(image), chunk_size=PAGE_SIZE, workers=2)
+
+    assert [(h.address, h.object_type) for h in hits] == [
+        (PAGE_SIZE, "FLT_INSTANCE"),
+        (PAGE_SIZE + 0x50, "FLT_VOLUME"),
+        (3 * PAGE_SIZE - 0x20, "FLT_FILTER"),
+    ]
+    assert not any(h.virtual for h in hits)
+
+
+def test_scan_image_empty(tmp_path):
+    image = tmp_path / "empty.bin"
+    image.write_bytes(b"")
+
+    assert scanner.scan_image(str(image)) == []
+
+
+def test_mark_reachable_matches_image_hits_on_links():
+    linked = scanner.ScanHit(0x110, "FMvo", "FLT_VOLUME", FLT_OBFL_TYPE_VOLUME, FLINK, BLINK, virtual=False)
+    unlinked = scanner.ScanHit(0x210, "FMvo", "FLT_VOLUME", FLT_OBFL_TYPE_VOLUME, BLINK, FLINK, virtual=False)
+    live = scanner.ScanHit(0xFFFF900000000110, "FMfl", "FLT_FILTER", FLT_OBFL_TYPE_FILTER, FLINK, BLINK)
+    reachable = scanner.Reachable(addresses={0x110}, links={(FLINK, BLINK)})
+
+    assert scanner.mark_reachable([linked, unlinked, live], reachable) == [unlinked, live]
+    assert (linked.reachable, unlinked.reachable, live.reachable) == (True, False, False)
+
+
+def _object(pykd_stub, address: int, flags: int) -> None:
+    pykd_stub.map(address, 0x400)
+    pykd_stub.write(address, "<I", flags)
+
+
+def test_walk_reachable_follows_volume_and_filter_instance_lists(pykd_stub):
+    from conftest import KERNEL
+
+    head = KERNEL + 0x10
+    flt, vol, on_volume, filter_only = KERNEL + 0x1000, KERNEL + 0x2000, KERNEL + 0x3000, KERNEL + 0x3400
+    _object(pykd_stub, flt, FLT_OBFL_TYPE_FILTER)
+    _object(pykd_stub, vol, FLT_OBFL_TYPE_VOLUME)
+    _object(pykd_stub, on_volume, FLT_OBFL_TYPE_INSTANCE)
+    _object(pykd_stub, filter_only, FLT_OBFL_TYPE_INSTANCE)
+    pykd_stub.link(head, [flt + 0x10, vol + 0x10])
+    pykd_stub.link(vol + 0x100 + 0x68, [on_volume + 0x10])
+    # Unlinked from its volume but still on its filter's instance list.
+    pykd_stub.link(filter_only + 0x10, [])
+    pykd_stub.link(flt + 0x80 + 0x68, [on_volume + 0x48, filter_only + 0x48])
+
+    reachable = scanner.walk_reachable([head])
+
+    assert reachable.addresses == {flt, vol, on_volume, filter_only}
+    assert (vol + 0x10, head) in reachable.links
+    assert (head, flt + 0x10) in reachable.links
+
+
+def test_walk_reachable_survives_cycles_and_unreadable_entries(pykd_stub):
+    from conftest import KERNEL
+
+    cyclic, broken = KERNEL + 0x10, KERNEL + 0x20
+    a, b, c = KERNEL + 0x1000, KERNEL + 0x1400, KERNEL + 0x1800
+    for obj in (a, b, c):
+        _object(pykd_stub, obj, FLT_OBFL_TYPE_FILTER)
+        pykd_stub.link(obj + 0x80 + 0x68, [])
+    # head -> a -> b -> a: never returns to the head.
+    pykd_stub.write(cyclic, "<QQ", a + 0x10, b + 0x10)
+    pykd_stub.write(a + 0x10, "<QQ", b + 0x10, cyclic)
+    pykd_stub.write(b + 0x10, "<QQ", a + 0x10, a + 0x10)
+    # head -> c -> unmapped page.
+    pykd_stub.write(broken, "<QQ", c + 0x10, c + 0x10)
+    pykd_stub.write(c + 0x10, "<QQ", KERNEL + 0x80000, broken)
+
+    reachable = scanner.walk_reachable([cyclic, broken])
+
+    assert reachable.addresses == {a, b, c}